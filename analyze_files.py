@@ -2,121 +2,224 @@
 Excel File Analyzer - For understanding eval and attainment sheet structures
 """
 import openpyxl
-from openpyxl.utils import get_column_letter
 import os
+import sys
+from concurrent.futures import ProcessPoolExecutor
 
-def analyze_excel_structure(file_path, max_rows=30, max_cols=20):
-    """Analyze Excel file structure and return formatted info"""
-    print(f"\n{'='*100}")
-    print(f"FILE: {os.path.basename(file_path)}")
-    print(f"{'='*100}")
+try:
+    from python_calamine import CalamineWorkbook
+except ImportError:  # calamine is optional; openpyxl handles everything
+    CalamineWorkbook = None
+
+
+def _format_value(value):
+    """Render a cell value for the preview table"""
+    return str(value) if value is not None else ""
+
+
+def _calamine_value(value):
+    """
+    Map calamine values to preview values
     
+    Calamine reports every number as a float, so it can't tell 1 from 1.0
+    the way openpyxl does. Whole numbers are shown as integers, which keeps
+    reg numbers readable but prints cells openpyxl shows as 1.0 as 1.
+    """
+    if value == "":
+        return None
+    if isinstance(value, float) and value.is_integer():
+        return int(value)
+    return value
+
+
+def _preview_with_openpyxl(file_path, max_rows, max_cols, lines):
+    """Append sheet previews using openpyxl (shows formulas)"""
+    # Only cell values are printed: skip external links, VBA and rich-text runs
+    wb = openpyxl.load_workbook(
+        file_path,
+        read_only=True,
+        data_only=False,
+        keep_links=False,
+        keep_vba=False,
+        rich_text=False
+    )
     try:
-        wb = openpyxl.load_workbook(file_path, data_only=False)
-        print(f"Sheet Names: {wb.sheetnames}")
+        lines.append(f"Sheet Names: {wb.sheetnames}")
         
         for sheet_name in wb.sheetnames:
             ws = wb[sheet_name]
-            print(f"\n--- Sheet: {sheet_name} ---")
-            print(f"Max Row: {ws.max_row}, Max Col: {ws.max_column}")
+            if ws.max_row is None or ws.max_column is None:
+                # Some sheets omit the dimension tag; size them with one streaming pass
+                ws.calculate_dimension(force=True)
+            lines.append(f"\n--- Sheet: {sheet_name} ---")
+            lines.append(f"Max Row: {ws.max_row}, Max Col: {ws.max_column}")
             
-            # Print header info and data structure
-            print(f"\nFirst {max_rows} rows:")
-            for row_idx in range(1, min(max_rows + 1, ws.max_row + 1)):
+            # Header info and data structure
+            lines.append(f"\nFirst {max_rows} rows:")
+            num_cols = min(max_cols, ws.max_column)
+            rows = ws.iter_rows(
+                min_row=1,
+                max_row=min(max_rows, ws.max_row),
+                max_col=num_cols
+            )
+            for row_idx, row in enumerate(rows, start=1):
                 row_data = []
-                for col_idx in range(1, min(max_cols + 1, ws.max_column + 1)):
-                    cell = ws.cell(row_idx, col_idx)
-                    value = cell.value
-                    
+                for cell in row:
                     # Show formulas if present
                     if cell.data_type == 'f':
-                        row_data.append(f"[FORMULA: {value}]")
+                        row_data.append(f"[FORMULA: {cell.value}]")
                     else:
-                        row_data.append(str(value) if value is not None else "")
+                        row_data.append(_format_value(cell.value))
                 
-                print(f"Row {row_idx:3d}: {' | '.join(row_data)}")
+                lines.append(f"Row {row_idx:3d}: {' | '.join(row_data)}")
             
-            print(f"\n... (Total {ws.max_row} rows)")
-    
-    except Exception as e:
-        print(f"ERROR: {e}")
-
-# Analyze all relevant files
-print("\n" + "="*100)
-print(" ANALYSIS OF EVAL SHEETS AND ATTAINMENT TEMPLATES ".center(100, "="))
-print("="*100)
-
-# 1. DEPT THEORY EVAL SHEETS
-print("\n\n### DEPARTMENT THEORY EVAL SHEETS ###")
-analyze_excel_structure("sample/input_R17/theory_eval/Dept_theory/C211_IA1_b1923_r17.xlsx", max_rows=20)
-analyze_excel_structure("sample/input_R17/theory_eval/Dept_theory/C211_ia2_B2023_R17.xlsx", max_rows=20)
-analyze_excel_structure("sample/input_R17/theory_eval/Dept_theory/C211_mod_B1923_R17.xlsx", max_rows=20)
+            lines.append(f"\n... (Total {ws.max_row} rows)")
+    finally:
+        wb.close()
 
-# 2. S&H THEORY EVAL SHEETS
-print("\n\n### S&H THEORY EVAL SHEETS ###")
-analyze_excel_structure("sample/input_R17/theory_eval/S&H_theory/C101_ia1_B1923_R17.xlsx", max_rows=20)
-analyze_excel_structure("sample/input_R17/theory_eval/S&H_theory/C101_ia2_B2023_R17.xlsx", max_rows=20)
-analyze_excel_structure("sample/input_R17/theory_eval/S&H_theory/C101_mod_B1923_R17.xlsx", max_rows=20)
 
-# 3. ANALYTICAL EVAL SHEETS
-print("\n\n### ANALYTICAL EVAL SHEETS ###")
-analyze_excel_structure("sample/input_R17/analytical_eval/S&H_analytical/C102_ia1_B1923_R17.xlsx", max_rows=20)
-analyze_excel_structure("sample/input_R17/analytical_eval/S&H_analytical/C102_ia2_B2023_R17.xlsx", max_rows=20)
-analyze_excel_structure("sample/input_R17/analytical_eval/S&H_analytical/C102_mod_B1923_R17.xlsx", max_rows=20)
-
-# 4. LAB EVAL SHEET
-print("\n\n### LAB EVAL SHEET ###")
-analyze_excel_structure("sample/input_R17/lab_eval/C107_b19-23_r17.xlsx", max_rows=25)
-
-# 5. PROJECT EVAL SHEETS
-print("\n\n### PROJECT EVAL SHEETS ###")
-analyze_excel_structure("sample/input_R17/proj_eval/C411_project_review1_b1923_r17.xlsx", max_rows=20)
-analyze_excel_structure("sample/input_R17/proj_eval/C411_project_review2_b1923_r17.xlsx", max_rows=20)
-analyze_excel_structure("sample/input_R17/proj_eval/C411_project_review3_b1923_r17.xlsx", max_rows=20)
-
-# 6. ATTAINMENT TEMPLATES
-print("\n\n" + "="*100)
-print(" ATTAINMENT TEMPLATES ".center(100, "="))
-print("="*100)
-
-print("\n\n### DEPT THEORY TEMPLATE ###")
-analyze_excel_structure("Attainment_Template/Reg_17/Dept THEORY template_ R17 V3 AtSheet.xlsx", max_rows=40, max_cols=30)
+def _preview_with_calamine(file_path, max_rows, max_cols, lines):
+    """Append sheet previews using calamine (cached values only)"""
+    wb = CalamineWorkbook.from_path(str(file_path))
+    try:
+        lines.append(f"Sheet Names: {wb.sheet_names}")
+        
+        for sheet_name in wb.sheet_names:
+            sheet = wb.get_sheet_by_name(sheet_name)
+            end_row, end_col = sheet.end or (-1, -1)
+            total_rows, total_cols = end_row + 1, end_col + 1
+            lines.append(f"\n--- Sheet: {sheet_name} ---")
+            lines.append(f"Max Row: {total_rows}, Max Col: {total_cols}")
+            
+            # Header info and data structure
+            lines.append(f"\nFirst {max_rows} rows:")
+            num_cols = min(max_cols, total_cols)
+            rows = sheet.to_python(skip_empty_area=False, nrows=max_rows)
+            for row_idx, row in enumerate(rows, start=1):
+                row_data = [_format_value(_calamine_value(value)) for value in row[:num_cols]]
+                lines.append(f"Row {row_idx:3d}: {' | '.join(row_data)}")
+            
+            lines.append(f"\n... (Total {total_rows} rows)")
+    finally:
+        # CalamineWorkbook.close() is missing from older python-calamine releases
+        if hasattr(wb, 'close'):
+            wb.close()
 
-print("\n\n### DEPT THEORY ANALYTICAL TEMPLATE ###")
-analyze_excel_structure("Attainment_Template/Reg_17/Dept THEORY Analytical template_R17 V3 AtSheet.xlsx", max_rows=40, max_cols=30)
 
-print("\n\n### S&H THEORY TEMPLATE ###")
-analyze_excel_structure("Attainment_Template/Reg_17/S&H THEORY template _R17 V3 AtSheet.xlsx", max_rows=40, max_cols=30)
+def analyze_excel_structure(file_path, max_rows=30, max_cols=20, show_formulas=True):
+    """
+    Analyze Excel file structure and return formatted info
+    
+    Formulas are only visible through openpyxl, so value-only previews
+    (show_formulas=False) use the faster calamine reader when installed.
+    Those previews print whole-number floats without the trailing .0.
+    """
+    lines = [
+        f"\n{'='*100}",
+        f"FILE: {os.path.basename(file_path)}",
+        f"{'='*100}",
+    ]
+    
+    try:
+        if show_formulas or CalamineWorkbook is None:
+            _preview_with_openpyxl(file_path, max_rows, max_cols, lines)
+        else:
+            _preview_with_calamine(file_path, max_rows, max_cols, lines)
+    except Exception as e:
+        lines.append(f"ERROR: {e}")
+    
+    return "\n".join(lines)
 
-print("\n\n### S&H ANALYTICAL TEMPLATE ###")
-analyze_excel_structure("Attainment_Template/Reg_17/S&H THEORY template Analytical_R17 V3 AtSheet.xlsx", max_rows=40, max_cols=30)
 
-print("\n\n### LAB TEMPLATE ###")
-analyze_excel_structure("Attainment_Template/Reg_17/LAB template_R17 V3 AtSheet.xlsx", max_rows=40, max_cols=30)
+def _analyze_worker(task):
+    """Analyze one file inside a worker process"""
+    file_path, max_rows, max_cols, show_formulas = task
+    return analyze_excel_structure(file_path, max_rows, max_cols, show_formulas)
 
-print("\n\n### PROJECT TEMPLATE ###")
-analyze_excel_structure("Attainment_Template/Reg_17/Project template_R17 V3 AtSheet.xlsx", max_rows=40, max_cols=30)
 
-# 7. OUTPUT ATTAINMENT SHEETS (SAMPLES)
-print("\n\n" + "="*100)
-print(" SAMPLE OUTPUT ATTAINMENT SHEETS ".center(100, "="))
-print("="*100)
+def _banner(title, lead="\n\n"):
+    """Section banner spanning the report width"""
+    return f"{lead}{'='*100}\n{title.center(100, '=')}\n{'='*100}"
 
-print("\n\n### DEPT THEORY OUTPUT ###")
-analyze_excel_structure("sample/output_R17/B19-23-C211-CS8491-COMPUTER ARCHITECTURE.xlsx", max_rows=40, max_cols=30)
 
-print("\n\n### S&H THEORY OUTPUT ###")
-analyze_excel_structure("sample/output_R17/C101 Communicative English R17 V3 AtSheet.xlsx", max_rows=40, max_cols=30)
+# Report layout: strings are printed as-is, tuples are analysis tasks of
+# (file_path, max_rows, max_cols, show_formulas)
+REPORT = [
+    _banner(" ANALYSIS OF EVAL SHEETS AND ATTAINMENT TEMPLATES ", lead="\n"),
+    
+    # 1. DEPT THEORY EVAL SHEETS
+    "\n\n### DEPARTMENT THEORY EVAL SHEETS ###",
+    ("sample/input_R17/theory_eval/Dept_theory/C211_IA1_b1923_r17.xlsx", 20, 20, False),
+    ("sample/input_R17/theory_eval/Dept_theory/C211_ia2_B2023_R17.xlsx", 20, 20, False),
+    ("sample/input_R17/theory_eval/Dept_theory/C211_mod_B1923_R17.xlsx", 20, 20, False),
+    
+    # 2. S&H THEORY EVAL SHEETS
+    "\n\n### S&H THEORY EVAL SHEETS ###",
+    ("sample/input_R17/theory_eval/S&H_theory/C101_ia1_B1923_R17.xlsx", 20, 20, False),
+    ("sample/input_R17/theory_eval/S&H_theory/C101_ia2_B2023_R17.xlsx", 20, 20, False),
+    ("sample/input_R17/theory_eval/S&H_theory/C101_mod_B1923_R17.xlsx", 20, 20, False),
+    
+    # 3. ANALYTICAL EVAL SHEETS
+    "\n\n### ANALYTICAL EVAL SHEETS ###",
+    ("sample/input_R17/analytical_eval/S&H_analytical/C102_ia1_B1923_R17.xlsx", 20, 20, False),
+    ("sample/input_R17/analytical_eval/S&H_analytical/C102_ia2_B2023_R17.xlsx", 20, 20, False),
+    ("sample/input_R17/analytical_eval/S&H_analytical/C102_mod_B1923_R17.xlsx", 20, 20, False),
+    
+    # 4. LAB EVAL SHEET
+    "\n\n### LAB EVAL SHEET ###",
+    ("sample/input_R17/lab_eval/C107_b19-23_r17.xlsx", 25, 20, True),
+    
+    # 5. PROJECT EVAL SHEETS
+    "\n\n### PROJECT EVAL SHEETS ###",
+    ("sample/input_R17/proj_eval/C411_project_review1_b1923_r17.xlsx", 20, 20, False),
+    ("sample/input_R17/proj_eval/C411_project_review2_b1923_r17.xlsx", 20, 20, False),
+    ("sample/input_R17/proj_eval/C411_project_review3_b1923_r17.xlsx", 20, 20, False),
+    
+    # 6. ATTAINMENT TEMPLATES
+    _banner(" ATTAINMENT TEMPLATES "),
+    "\n\n### DEPT THEORY TEMPLATE ###",
+    ("Attainment_Template/Reg_17/Dept THEORY template_ R17 V3 AtSheet.xlsx", 40, 30, True),
+    "\n\n### DEPT THEORY ANALYTICAL TEMPLATE ###",
+    ("Attainment_Template/Reg_17/Dept THEORY Analytical template_R17 V3 AtSheet.xlsx", 40, 30, True),
+    "\n\n### S&H THEORY TEMPLATE ###",
+    ("Attainment_Template/Reg_17/S&H THEORY template _R17 V3 AtSheet.xlsx", 40, 30, True),
+    "\n\n### S&H ANALYTICAL TEMPLATE ###",
+    ("Attainment_Template/Reg_17/S&H THEORY template Analytical_R17 V3 AtSheet.xlsx", 40, 30, True),
+    "\n\n### LAB TEMPLATE ###",
+    ("Attainment_Template/Reg_17/LAB template_R17 V3 AtSheet.xlsx", 40, 30, True),
+    "\n\n### PROJECT TEMPLATE ###",
+    ("Attainment_Template/Reg_17/Project template_R17 V3 AtSheet.xlsx", 40, 30, True),
+    
+    # 7. OUTPUT ATTAINMENT SHEETS (SAMPLES)
+    _banner(" SAMPLE OUTPUT ATTAINMENT SHEETS "),
+    "\n\n### DEPT THEORY OUTPUT ###",
+    ("sample/output_R17/B19-23-C211-CS8491-COMPUTER ARCHITECTURE.xlsx", 40, 30, True),
+    "\n\n### S&H THEORY OUTPUT ###",
+    ("sample/output_R17/C101 Communicative English R17 V3 AtSheet.xlsx", 40, 30, True),
+    "\n\n### ANALYTICAL OUTPUT ###",
+    ("sample/output_R17/C102 ENGINEERING MATHEMATICS I-Analytical_R17 V3 AtSheet.xlsx", 40, 30, True),
+    "\n\n### LAB OUTPUT ###",
+    ("sample/output_R17/C107 PROBLEM SOLVING AND PYTHON PROGRAMMING LABORATORY -R17 V3 AtSheet.xlsx", 40, 30, True),
+    "\n\n### PROJECT OUTPUT ###",
+    ("sample/output_R17/C411_project_attainment_b1923_r17.xlsx", 40, 30, True),
+    
+    _banner(" ANALYSIS COMPLETE "),
+]
 
-print("\n\n### ANALYTICAL OUTPUT ###")
-analyze_excel_structure("sample/output_R17/C102 ENGINEERING MATHEMATICS I-Analytical_R17 V3 AtSheet.xlsx", max_rows=40, max_cols=30)
 
-print("\n\n### LAB OUTPUT ###")
-analyze_excel_structure("sample/output_R17/C107 PROBLEM SOLVING AND PYTHON PROGRAMMING LABORATORY -R17 V3 AtSheet.xlsx", max_rows=40, max_cols=30)
+def main():
+    """Analyze every file in REPORT across all cores and print in order"""
+    tasks = [step for step in REPORT if isinstance(step, tuple)]
+    
+    # Files are independent and parsing is CPU-bound, so use processes.
+    # Workers only return text; printing stays in the parent to keep order.
+    with ProcessPoolExecutor(max_workers=os.cpu_count()) as executor:
+        reports = iter(list(executor.map(_analyze_worker, tasks)))
+    
+    # Emit the whole report with one write instead of a print per section
+    output = [step if isinstance(step, str) else next(reports) for step in REPORT]
+    sys.stdout.write("\n".join(output) + "\n")
 
-print("\n\n### PROJECT OUTPUT ###")
-analyze_excel_structure("sample/output_R17/C411_project_attainment_b1923_r17.xlsx", max_rows=40, max_cols=30)
 
-print("\n\n" + "="*100)
-print(" ANALYSIS COMPLETE ".center(100, "="))
-print("="*100)
+if __name__ == '__main__':
+    main()
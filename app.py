@@ -2,18 +2,27 @@
 CO-PO Attainment Sheet Generator
 Flask Web Application
 """
-from flask import Flask, render_template, request, redirect, url_for, flash, send_file, jsonify
+from flask import Flask, render_template, request, redirect, url_for, flash, send_from_directory, jsonify
+from flask_compress import Compress
+from werkzeug.exceptions import NotFound
 from werkzeug.utils import secure_filename
 import os
+import re
 from pathlib import Path
-import uuid
+import secrets
+import time
+import threading
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
 from datetime import datetime
-from io import BytesIO
+import shutil
+import tempfile
 
 from utils.template_mapper import TemplateMapper
 from utils.data_parser import DataParser
 from utils.validator import Validator
-from utils.excel_handler import ExcelHandler
+from utils.excel_handler import generate_from_bytes
 
 # Initialize Flask app
 app = Flask(__name__)
@@ -23,37 +32,154 @@ app.secret_key = os.environ.get('SECRET_KEY', 'co-po-attainment-secret-key-2026'
 BASE_DIR = Path(__file__).parent
 OUTPUT_FOLDER = BASE_DIR / 'outputs'
 ALLOWED_EXTENSIONS = {'xlsx', 'xls'}
+ALLOWED_SUFFIXES = tuple(f'.{ext}' for ext in ALLOWED_EXTENSIONS)
+SPOOL_MAX_SIZE = 2 * 1024 * 1024  # Uploads above 2MB spill to a temp file
+JOB_MAX_AGE = 3600  # Seconds a finished generation job is kept for polling
+UNSAFE_FILENAME_CHARS = re.compile(r'[^\w-]')  # Anything but letters, digits, - and _
+# Leading bytes of .xlsx (zip archive) and .xls (OLE2 compound file) files
+EXCEL_SIGNATURES = (b'PK\x03\x04', b'\xd0\xcf\x11\xe0')
 
 # Ensure directories exist
 OUTPUT_FOLDER.mkdir(exist_ok=True)
+OUTPUT_ROOT = OUTPUT_FOLDER.resolve()
 
 app.config['OUTPUT_FOLDER'] = str(OUTPUT_FOLDER)
 app.config['MAX_CONTENT_LENGTH'] = 16 * 1024 * 1024  # 16MB max file size
+# Let the front-end server (Apache mod_xsendfile, lighttpd) stream downloads
+app.config['USE_X_SENDFILE'] = os.environ.get('USE_X_SENDFILE', '0') == '1'
+
+# Compress pages and JSON; xlsx downloads are already zip files
+app.config['COMPRESS_ALGORITHM'] = ['br', 'gzip']
+app.config['COMPRESS_MIN_SIZE'] = 256
+app.config['COMPRESS_MIMETYPES'] = [
+    'text/html',
+    'text/css',
+    'text/javascript',
+    'application/javascript',
+    'application/json'
+]
+Compress(app)
 
 # Initialize utils
 template_mapper = TemplateMapper(BASE_DIR)
 parser = DataParser()
 validator = Validator()
-excel_handler = ExcelHandler(BASE_DIR)
+
+
+# Background generation jobs {job_id: {'future', 'created', 'context'}}
+JOBS = {}
+_jobs_lock = threading.Lock()
+_executor = None
+# Start pool workers from a clean process: forking the multi-threaded server
+# could copy locks that other request threads hold at that moment
+_MP_CONTEXT = multiprocessing.get_context(
+    'forkserver' if 'forkserver' in multiprocessing.get_all_start_methods() else 'spawn'
+)
+
+
+def get_executor(broken=None):
+    """
+    Get the process pool shared by all generation requests
+    
+    Pass a pool that raised BrokenProcessPool (a worker died, e.g. killed
+    for running out of memory) as broken to have it replaced.
+    """
+    global _executor
+    with _jobs_lock:
+        if _executor is None or _executor is broken:
+            if _executor is not None:
+                _executor.shutdown(wait=False)
+            _executor = ProcessPoolExecutor(max_workers=os.cpu_count(), mp_context=_MP_CONTEXT)
+        return _executor
+
+
+def submit_job(context, *args, **kwargs):
+    """Queue attainment generation in the process pool and return a job id"""
+    executor = get_executor()
+    try:
+        future = executor.submit(generate_from_bytes, *args, **kwargs)
+    except BrokenProcessPool:
+        # A dead worker takes the whole pool down; retry on a fresh one
+        future = get_executor(broken=executor).submit(generate_from_bytes, *args, **kwargs)
+    job_id = secrets.token_hex(16)
+    now = time.time()
+    
+    with _jobs_lock:
+        # Forget finished jobs nobody has polled for a while
+        for old_id in [jid for jid, job in JOBS.items()
+                       if job['future'].done() and now - job['created'] > JOB_MAX_AGE]:
+            del JOBS[old_id]
+        JOBS[job_id] = {'future': future, 'created': now, 'context': context}
+    
+    return job_id
+
+
+def get_job_state(job):
+    """Map a job's future onto queued/running/finished/failed"""
+    future = job['future']
+    if not future.done():
+        return 'running' if future.running() else 'queued'
+    if future.exception() is not None or not future.result()['success']:
+        return 'failed'
+    return 'finished'
 
 
 def allowed_file(filename):
     """Check if file extension is allowed"""
-    return '.' in filename and filename.rsplit('.', 1)[1].lower() in ALLOWED_EXTENSIONS
+    return filename.lower().endswith(ALLOWED_SUFFIXES)
+
+
+class _UploadSpool(tempfile.SpooledTemporaryFile):
+    """Spooled temp file that carries the original upload filename"""
+    # Shadow the read-only name property so the upload name can be stored
+    name = None
+
+
+def spool_upload(file):
+    """
+    Stream an uploaded file into a spooled temp file
+    
+    Small uploads stay in memory, larger ones spill to disk, so the full
+    upload is never held as one bytes object.
+    """
+    spool = _UploadSpool(max_size=SPOOL_MAX_SIZE)
+    shutil.copyfileobj(file.stream, spool)
+    spool.seek(0)
+    spool.name = file.filename  # Store original filename
+    return spool
+
+
+def has_excel_signature(file_content):
+    """Check the file starts like an Excel workbook before parsing it"""
+    head = file_content.read(4)
+    file_content.seek(0)
+    return head in EXCEL_SIGNATURES
 
 
 def cleanup_old_files(folder, max_age_hours=24):
     """Remove files older than max_age_hours"""
-    import time
-    current_time = time.time()
-    for file_path in Path(folder).glob('*'):
-        if file_path.is_file():
-            file_age = current_time - file_path.stat().st_mtime
-            if file_age > (max_age_hours * 3600):
-                try:
-                    file_path.unlink()
-                except:
-                    pass
+    cutoff = time.time() - max_age_hours * 3600
+    # scandir hands back cached stat data, so each entry costs one syscall
+    with os.scandir(folder) as entries:
+        for entry in entries:
+            try:
+                if entry.is_file(follow_symlinks=False) and entry.stat().st_mtime < cutoff:
+                    os.unlink(entry.path)
+            except OSError:
+                pass
+
+
+# Lookup endpoints serve static template metadata, so browsers may reuse them
+CACHEABLE_ENDPOINTS = {'get_categories', 'get_dept_types', 'get_required_inputs'}
+
+
+@app.after_request
+def add_cache_headers(response):
+    """Let browsers cache the template lookup API responses"""
+    if (request.method == 'GET' and request.endpoint in CACHEABLE_ENDPOINTS
+            and response.status_code == 200):
+        response.headers['Cache-Control'] = 'public, max-age=300'
+    return response
 
 
 @app.route('/')
@@ -120,9 +246,12 @@ def generate():
                 flash(f'Invalid file type for {input_type}. Only .xlsx and .xls allowed.', 'error')
                 return redirect(url_for('index'))
             
-            # Read file into memory
-            file_content = BytesIO(file.read())
-            file_content.name = file.filename  # Store original filename
+            # Spool upload (in memory when small, on disk when large)
+            file_content = spool_upload(file)
+            
+            if not has_excel_signature(file_content):
+                flash(f'File for {input_type} is not a valid Excel workbook.', 'error')
+                return redirect(url_for('index'))
             
             eval_files[input_type] = file_content
             file_objects[input_type] = file_content
@@ -131,7 +260,7 @@ def generate():
         validation_result = validator.validate_all(list(eval_files.values()), regulation)
         
         if not validation_result.is_valid:
-            flash('Validation failed: ' + '; '.join(validation_result.errors), 'error')
+            flash('Validation failed: ' + '; '.join(validation_result.formatted_errors), 'error')
             return redirect(url_for('index'))
         
         # Show warnings if any
@@ -139,15 +268,17 @@ def generate():
             for warning in validation_result.warnings[:5]:  # Show first 5 warnings
                 flash(f'Warning: {warning}', 'warning')
         
-        # Extract course info for output filename
-        first_file = list(eval_files.values())[0]
-        course_info = parser.extract_validation_fields(first_file)
+        # Course info for output filename (already parsed by the validator)
+        if validation_result.metadata:
+            course_info = validation_result.metadata[0]
+        else:
+            course_info = parser.extract_validation_fields(next(iter(eval_files.values())))
         
         course_code = course_info.get('course_code', 'UNKNOWN')
         course_name = course_info.get('course_name', 'Course')
         
         # Clean course name for filename
-        safe_course_name = "".join(c if c.isalnum() or c in ('-', '_') else '_' for c in course_name)
+        safe_course_name = UNSAFE_FILENAME_CHARS.sub('_', course_name)
         safe_course_name = safe_course_name[:50].strip('_')  # Limit length and trim underscores
         
         # Generate output filename
@@ -155,51 +286,96 @@ def generate():
         output_filename = f"{course_code}_{safe_course_name}_{regulation}_Attainment_{timestamp}.xlsx"
         output_path = OUTPUT_FOLDER / output_filename
         
-        # Generate attainment sheet
-        result = excel_handler.generate_attainment_sheet(
+        # Workers get plain bytes; spooled uploads don't pickle
+        eval_bytes = {}
+        for input_type, file_content in eval_files.items():
+            file_content.seek(0)
+            eval_bytes[input_type] = (file_content.name, file_content.read())
+            file_content.close()
+        
+        # Generate attainment sheet in the background
+        job_id = submit_job(
+            {
+                'filename': output_filename,
+                'course_code': course_code,
+                'course_name': course_name,
+                'regulation': regulation,
+                'category': category
+            },
             regulation=regulation,
             category=category,
             dept_type=dept_type,
-            eval_files=eval_files,
+            eval_bytes=eval_bytes,
             output_path=str(output_path),
             course_info=course_info
         )
         
-        if not result['success']:
-            flash(f'Generation failed: {result.get("error", "Unknown error")}', 'error')
-            return redirect(url_for('index'))
-        
-        flash(f'Successfully generated attainment sheet with {result["students_count"]} students!', 'success')
-        
-        return render_template('result.html', 
-                             filename=output_filename,
-                             course_code=course_code,
-                             course_name=course_name,
-                             students_count=result['students_count'],
-                             regulation=regulation,
-                             category=category)
+        return render_template('pending.html', job_id=job_id)
     
     except Exception as e:
         flash(f'Error: {str(e)}', 'error')
         return redirect(url_for('index'))
 
 
+@app.route('/api/job/<job_id>')
+def job_status(job_id):
+    """API endpoint to poll a generation job"""
+    job = JOBS.get(job_id)
+    if job is None:
+        return jsonify({'error': 'Unknown job'}), 404
+    
+    return jsonify({
+        'state': get_job_state(job),
+        'redirect': url_for('result', job_id=job_id)
+    })
+
+
+@app.route('/result/<job_id>')
+def result(job_id):
+    """Show the outcome of a generation job"""
+    job = JOBS.get(job_id)
+    if job is None:
+        flash('Job not found. It may have expired.', 'error')
+        return redirect(url_for('index'))
+    
+    future = job['future']
+    if not future.done():
+        return render_template('pending.html', job_id=job_id)
+    
+    try:
+        result = future.result()
+    except Exception as e:
+        result = {'success': False, 'error': str(e)}
+    
+    if not result['success']:
+        flash(f'Generation failed: {result.get("error", "Unknown error")}', 'error')
+        return redirect(url_for('index'))
+    
+    flash(f'Successfully generated attainment sheet with {result["students_count"]} students!', 'success')
+    
+    return render_template('result.html',
+                         students_count=result['students_count'],
+                         **job['context'])
+
+
 @app.route('/download/<path:filename>')
 def download(filename):
     """Download generated attainment sheet"""
-    # Don't use secure_filename here as it modifies spaces and special chars
-    # The filename is already sanitized during generation
-    file_path = OUTPUT_FOLDER / filename
-    
-    if not file_path.exists():
+    # Don't use secure_filename here as it modifies spaces and special chars.
+    # send_from_directory joins safely, so names can't escape OUTPUT_ROOT.
+    try:
+        # conditional/etag let repeat downloads of the same sheet return 304
+        return send_from_directory(
+            OUTPUT_ROOT,
+            filename,
+            as_attachment=True,
+            conditional=True,
+            etag=True,
+            max_age=0
+        )
+    except NotFound:
         flash('File not found. It may have been deleted.', 'error')
         return redirect(url_for('index'))
-    
-    return send_file(
-        str(file_path),
-        as_attachment=True,
-        download_name=filename
-    )
 
 
 @app.route('/api/validate', methods=['POST'])
@@ -210,12 +386,19 @@ def api_validate():
         
         # Get all uploaded files in-memory
         file_objects = []
+        errors = []
         
         for key, file in request.files.items():
             if file and allowed_file(file.filename):
-                file_content = BytesIO(file.read())
-                file_content.name = file.filename
-                file_objects.append(file_content)
+                file_content = spool_upload(file)
+                if has_excel_signature(file_content):
+                    file_objects.append(file_content)
+                else:
+                    errors.append(f'{file.filename} is not a valid Excel workbook')
+        
+        # Reject mis-named uploads before parsing anything
+        if errors:
+            return jsonify({'valid': False, 'errors': errors, 'warnings': []})
         
         if not file_objects:
             return jsonify({'valid': False, 'errors': ['No valid files uploaded']})
@@ -225,8 +408,8 @@ def api_validate():
         
         return jsonify({
             'valid': result.is_valid,
-            'errors': result.errors,
-            'warnings': result.warnings
+            'errors': result.formatted_errors,
+            'warnings': result.formatted_warnings
         })
     
     except Exception as e:
@@ -247,8 +430,8 @@ def server_error(e):
     return redirect(url_for('index'))
 
 
-# Cleanup old files on startup
-cleanup_old_files(OUTPUT_FOLDER)
+# Cleanup old files on startup without holding up the first request
+threading.Thread(target=cleanup_old_files, args=(OUTPUT_FOLDER,), daemon=True).start()
 
 
 if __name__ == '__main__':
@@ -261,4 +444,10 @@ if __name__ == '__main__':
     print("Starting server at http://localhost:5000")
     print("=" * 60)
     
-    app.run(debug=True, host='0.0.0.0', port=5000)
+    if os.environ.get('FLASK_ENV') == 'development':
+        # Auto-reloading debug server, single process
+        app.run(debug=True, host='0.0.0.0', port=5000)
+    else:
+        # Production WSGI server; see wsgi.py for gunicorn/waitress-serve
+        from waitress import serve
+        serve(app, host='0.0.0.0', port=5000, threads=8)
@@ -5,9 +5,47 @@ Extracts marks and validation fields from evaluation sheets
 import openpyxl
 from openpyxl.utils import get_column_letter
 from pathlib import Path
-from typing import Dict, List, Any, Optional, Tuple, Union
+from typing import Dict, List, Any, Optional, Tuple, Union, Iterator
 from io import BytesIO
+from contextlib import contextmanager
+import hashlib
 import re
+import weakref
+from operator import itemgetter
+import numpy as np
+import pandas as pd
+
+try:
+    from python_calamine import CalamineWorkbook
+except ImportError:  # calamine is optional; openpyxl reads everything
+    CalamineWorkbook = None
+
+
+# Regulation year, e.g. 'R2017 - AUC' -> '17'
+_REG_PATTERN = re.compile(r'R?20?(\d{2})')
+
+# Assessment keywords in priority order. The first rule whose pattern
+# matches decides the type: either a fixed name, or a {digit: name} map
+# checked in order against the digits anywhere in the assessment name.
+_ASSESSMENT_RULES = (
+    (re.compile(r'INTERNAL|IA'), {'1': 'IA1', '2': 'IA2'}),  # IA also covers CIA
+    (re.compile(r'MODEL'), 'Model'),
+    (re.compile(r'LAB'), 'Lab'),  # also matches LABORATORY
+    (re.compile(r'PROJECT|REVIEW'), {'1': 'Review1', '2': 'Review2', '3': 'Review3'}),
+    (re.compile(r'INTEGRATED'), 'Integrated'),
+)
+
+
+def content_digest(file_source) -> str:
+    """Hash of a file-like sheet's bytes, leaving its position unchanged"""
+    if hasattr(file_source, 'getvalue'):
+        data = file_source.getvalue()
+    else:
+        position = file_source.tell()
+        file_source.seek(0)
+        data = file_source.read()
+        file_source.seek(position)
+    return hashlib.blake2b(data, digest_size=16).hexdigest()
 
 
 class DataParser:
@@ -39,25 +77,137 @@ class DataParser:
     REG_NO_COL = 2
     NAME_COL = 3
     
+    # Read buffer for sheets openpyxl opens from disk (default is 8 KiB)
+    READ_BUFFER_SIZE = 128 * 1024
+    
+    # Suffixes openpyxl accepts; others are passed through as paths so its
+    # "unsupported format" error is kept
+    _OPENPYXL_SUFFIXES = ('.xlsx', '.xlsm', '.xltx', '.xltm')
+    
     def __init__(self):
         """Initialize DataParser"""
-        pass
+        # parse_workbook results for file-like sources (uploads) with the
+        # digest of the bytes they were parsed from, dropped automatically
+        # when the source object is garbage collected
+        self._parsed = weakref.WeakKeyDictionary()
     
-    def load_workbook(self, file_source: Union[str, BytesIO]) -> openpyxl.Workbook:
+    def load_workbook(self, file_source: Union[str, BytesIO], read_only: bool = False) -> openpyxl.Workbook:
         """
         Load Excel workbook from file path or file-like object
         
         Args:
-            file_source: Path to Excel file or BytesIO object
+            file_source: Path to Excel file or file-like object (BytesIO, spooled upload)
+            read_only: Stream the sheet instead of building it in memory.
+                       Read-only sheets must be read with iter_rows, since
+                       ws.cell() rescans the XML on every call.
             
         Returns:
             openpyxl Workbook object
         """
-        if isinstance(file_source, BytesIO):
+        if hasattr(file_source, 'seek'):
             file_source.seek(0)  # Reset file pointer to beginning
-            return openpyxl.load_workbook(file_source, data_only=True)
+        if read_only:
+            return openpyxl.load_workbook(
+                file_source,
+                data_only=True,
+                read_only=True,
+                keep_links=False,
+                keep_vba=False
+            )
         return openpyxl.load_workbook(file_source, data_only=True)
     
+    @contextmanager
+    def _open_ws(self, file_source: Union[str, BytesIO]):
+        """
+        Open the active worksheet read-only for the duration of a with block
+        
+        The workbook is closed and its references dropped on exit, even if
+        reading fails part way through.
+        """
+        if isinstance(file_source, (str, Path)) and str(file_source).lower().endswith(self._OPENPYXL_SUFFIXES):
+            # zipfile reads members in small chunks; a large buffer saves syscalls
+            with open(file_source, 'rb', buffering=self.READ_BUFFER_SIZE) as fh:
+                with self._open_ws(fh) as ws:
+                    yield ws
+            return
+        
+        wb = self.load_workbook(file_source, read_only=True)
+        try:
+            yield wb.active
+        finally:
+            wb.close()
+            del wb
+    
+    @staticmethod
+    def _calamine_value(value: Any) -> Any:
+        """Map calamine values onto what openpyxl reports for the same cell"""
+        if value == '':
+            return None
+        if isinstance(value, float) and value.is_integer():
+            return int(value)
+        return value
+    
+    def _calamine_rows(self, file_source: Union[str, BytesIO], max_row: Optional[int]) -> Optional[List[list]]:
+        """
+        Read the sheet rows with calamine
+        
+        Returns:
+            Rows from row 1 on, or None when calamine can't be used (not
+            installed, unreadable file, or several sheets where only openpyxl
+            knows which one is active)
+        """
+        if CalamineWorkbook is None:
+            return None
+        
+        try:
+            if hasattr(file_source, 'seek'):
+                file_source.seek(0)
+                wb = CalamineWorkbook.from_filelike(file_source)
+            else:
+                wb = CalamineWorkbook.from_path(str(file_source))
+        except Exception:
+            return None
+        
+        try:
+            if len(wb.sheet_names) != 1:
+                return None
+            sheet = wb.get_sheet_by_index(0)
+            return sheet.to_python(skip_empty_area=False, nrows=max_row)
+        except Exception:
+            return None
+        finally:
+            # CalamineWorkbook.close() is missing from older python-calamine releases
+            if hasattr(wb, 'close'):
+                wb.close()
+    
+    def iter_sheet_rows(
+        self,
+        file_source: Union[str, BytesIO],
+        min_row: int = 1,
+        max_row: Optional[int] = None
+    ) -> Iterator[tuple]:
+        """
+        Yield value tuples for rows of the active sheet
+        
+        Uses the calamine (Rust) reader when installed and falls back to
+        openpyxl in read-only mode. Rows missing from the sheet come back as
+        empty tuples, and rows may be shorter than the widest row.
+        
+        Args:
+            file_source: Path to evaluation sheet or BytesIO object
+            min_row: First row to yield (1-indexed)
+            max_row: Last row to yield (inclusive), or None for all rows
+        """
+        rows = self._calamine_rows(file_source, max_row)
+        if rows is not None:
+            convert = self._calamine_value
+            for row in rows[min_row - 1:]:
+                yield tuple(convert(value) for value in row)
+            return
+        
+        with self._open_ws(file_source) as ws:
+            yield from ws.iter_rows(min_row=min_row, max_row=max_row, values_only=True)
+    
     def extract_validation_fields(self, file_source: Union[str, BytesIO]) -> Dict[str, str]:
         """
         Extract metadata/validation fields from evaluation sheet
@@ -78,15 +228,24 @@ class DataParser:
                 'assessment_name': 'INTERNAL ASSESSMENT-1'
             }
         """
-        wb = self.load_workbook(file_source)
-        ws = wb.active
+        if not isinstance(file_source, (str, Path)):
+            # Uploads get fully parsed by the later checks anyway; share that parse
+            return dict(self.parse_workbook(file_source)['fields'])
+        
+        # Metadata sits in one column block, so read it in a single pass
+        first_row = min(self.METADATA_ROWS.values())
+        last_row = max(self.METADATA_ROWS.values())
+        rows = self.iter_sheet_rows(file_source, min_row=first_row, max_row=last_row)
+        values = {
+            row_num: self._cell_value(row, self.METADATA_COL)
+            for row_num, row in enumerate(rows, start=first_row)
+        }
         
         fields = {}
         for field_name, row_num in self.METADATA_ROWS.items():
-            cell_value = ws.cell(row=row_num, column=self.METADATA_COL).value
+            cell_value = values.get(row_num)
             fields[field_name] = str(cell_value).strip() if cell_value else ''
         
-        wb.close()
         return fields
     
     def normalize_regulation(self, reg_string: str) -> str:
@@ -102,7 +261,7 @@ class DataParser:
         reg_string = str(reg_string).upper()
         
         # Extract year from various formats
-        match = re.search(r'R?20?(\d{2})', reg_string)
+        match = _REG_PATTERN.search(reg_string)
         if match:
             year = match.group(1)
             return f'R{year}'
@@ -121,52 +280,203 @@ class DataParser:
         """
         assessment_name = str(assessment_name).upper()
         
-        if 'INTERNAL' in assessment_name or 'IA' in assessment_name:
-            if '1' in assessment_name:
-                return 'IA1'
-            elif '2' in assessment_name:
-                return 'IA2'
-        elif 'MODEL' in assessment_name:
-            return 'Model'
-        elif 'LAB' in assessment_name or 'LABORATORY' in assessment_name:
-            return 'Lab'
-        elif 'PROJECT' in assessment_name or 'REVIEW' in assessment_name:
-            if '1' in assessment_name:
-                return 'Review1'
-            elif '2' in assessment_name:
-                return 'Review2'
-            elif '3' in assessment_name:
-                return 'Review3'
-        elif 'INTEGRATED' in assessment_name:
-            return 'Integrated'
+        for pattern, result in _ASSESSMENT_RULES:
+            if pattern.search(assessment_name):
+                if isinstance(result, str):
+                    return result
+                for digit, numbered in result.items():
+                    if digit in assessment_name:
+                        return numbered
+                break
         
         return 'Unknown'
     
-    def find_co_columns(self, ws) -> List[Tuple[int, int]]:
+    def _read_rows(self, ws, first_row: int, last_row: int) -> List[tuple]:
         """
-        Find columns containing CO totals (not individual question marks)
+        Read a block of rows as value tuples in one pass
         
         Args:
             ws: Worksheet object
+            first_row: First row to read (1-indexed)
+            last_row: Last row to read (inclusive)
             
         Returns:
-            List of tuples: [(column_index, co_number), ...]
+            One tuple per row; rows missing from the sheet come back empty
+        """
+        rows = list(ws.iter_rows(min_row=first_row, max_row=last_row, values_only=True))
+        rows += [()] * (last_row - first_row + 1 - len(rows))
+        return rows
+    
+    @staticmethod
+    def _cell_value(row: tuple, col: int) -> Any:
+        """Get value at a 1-indexed column of a row tuple (None past its end)"""
+        return row[col - 1] if col <= len(row) else None
+    
+    @staticmethod
+    def _coerce_marks(frame: pd.DataFrame) -> np.ndarray:
+        """
+        Coerce a block of mark cells to floats column by column
+        
+        Empty and non-numeric cells count as 0, as they always have.
+        """
+        return frame.apply(pd.to_numeric, errors='coerce').fillna(0).to_numpy(dtype=np.float64)
+    
+    def _parse_header(self, headers: tuple, co_nums: tuple) -> Tuple[List[Tuple[int, int]], Optional[int]]:
+        """
+        Find CO total columns and the TOTAL column in one walk of the header
+        
+        Args:
+            headers: Question header row (row 11) values
+            co_nums: CO mapping row (row 12) values
+            
+        Returns:
+            Tuple of ([(column_index, co_number), ...], total column or None)
         """
         co_columns = []
+        total_col = None
         
-        # Check row 11 for 'CO' headers and row 12 for CO numbers
-        for col in range(4, ws.max_column + 1):
-            header = ws.cell(row=self.QUESTION_ROW, column=col).value
-            co_num = ws.cell(row=self.CO_MAPPING_ROW, column=col).value
+        for col in range(4, len(headers) + 1):
+            header = headers[col - 1]
+            if not header:
+                continue
             
-            if header and str(header).upper().strip() == 'CO':
+            header = str(header).upper()
+            if header.strip() == 'CO':
                 try:
-                    co_number = int(float(str(co_num)))
+                    co_number = int(float(str(self._cell_value(co_nums, col))))
                     co_columns.append((col, co_number))
                 except (ValueError, TypeError):
                     pass
+            elif total_col is None and 'TOTAL' in header:
+                total_col = col
         
-        return co_columns
+        return co_columns, total_col
+    
+    def find_co_columns(self, ws) -> List[Tuple[int, int]]:
+        """
+        Find columns containing CO totals (not individual question marks)
+        
+        Args:
+            ws: Worksheet object
+            
+        Returns:
+            List of tuples: [(column_index, co_number), ...]
+        """
+        # Check row 11 for 'CO' headers and row 12 for CO numbers
+        headers, co_nums = self._read_rows(ws, self.QUESTION_ROW, self.CO_MAPPING_ROW)
+        return self._parse_header(headers, co_nums)[0]
+    
+    def find_total_column(self, ws) -> Optional[int]:
+        """
+        Find the TOTAL column in the question header row
+        
+        Args:
+            ws: Worksheet object
+            
+        Returns:
+            Column index, or None if the sheet has no TOTAL column
+        """
+        (headers,) = self._read_rows(ws, self.QUESTION_ROW, self.QUESTION_ROW)
+        return self._parse_header(headers, ())[1]
+    
+    def parse_workbook(self, file_source: Union[str, BytesIO]) -> Dict[str, Any]:
+        """
+        Parse metadata, max marks and student marks with a single sheet scan
+        
+        File-like sources are parsed once per object and content: later
+        calls (and the extract_* wrappers) reuse the result while the object
+        is alive and its bytes are unchanged. Treat the returned data as
+        read-only.
+        
+        Args:
+            file_source: Path to evaluation sheet or BytesIO object
+            
+        Returns:
+            Dictionary with one entry per extract_* method:
+            {
+                'fields': {...},     # as extract_validation_fields
+                'max_marks': {...},  # as extract_max_marks
+                'students': {...}    # as extract_student_data
+            }
+        """
+        if isinstance(file_source, (str, Path)):
+            return self._parse_sheet(file_source)
+        
+        try:
+            digest = content_digest(file_source)
+            cached = self._parsed.get(file_source)
+        except (TypeError, ValueError, OSError):
+            # Not weak-referenceable, or closed: parse (or fail) as usual
+            return self._parse_sheet(file_source)
+        
+        if cached is not None and cached[0] == digest:
+            return cached[1]
+        
+        parsed = self._parse_sheet(file_source)
+        self._parsed[file_source] = (digest, parsed)
+        return parsed
+    
+    def _parse_sheet(self, file_source: Union[str, BytesIO]) -> Dict[str, Any]:
+        """Single-pass sheet scan behind parse_workbook"""
+        first_row = min(self.METADATA_ROWS.values())
+        rows = list(self.iter_sheet_rows(file_source, min_row=first_row))
+        
+        def sheet_row(row_num: int) -> tuple:
+            index = row_num - first_row
+            return rows[index] if index < len(rows) else ()
+        
+        # Rows 2-9 are metadata, 11-13 the header block, 14+ student data
+        fields = {}
+        for field_name, row_num in self.METADATA_ROWS.items():
+            cell_value = self._cell_value(sheet_row(row_num), self.METADATA_COL)
+            fields[field_name] = str(cell_value).strip() if cell_value else ''
+        
+        co_columns, total_col = self._parse_header(
+            sheet_row(self.QUESTION_ROW),
+            sheet_row(self.CO_MAPPING_ROW)
+        )
+        
+        # Max marks row on top of the student rows so both coerce together;
+        # columns are 0-based and a missing TOTAL column reads as empty
+        block = pd.DataFrame(
+            [sheet_row(self.MAX_MARKS_ROW)] + rows[self.DATA_START_ROW - first_row:],
+            dtype=object
+        )
+        mark_cols = [col - 1 for col, _ in co_columns] + [total_col - 1 if total_col else -1]
+        ids = block.reindex(columns=[self.REG_NO_COL - 1, self.NAME_COL - 1]).iloc[1:]
+        
+        # Skip empty rows
+        filled = (ids.notna() & ids.astype(bool)).all(axis=1)
+        ids = ids[filled]
+        keep = np.concatenate(([True], filled.to_numpy()))
+        
+        max_values, *student_values = self._coerce_marks(
+            block.reindex(columns=mark_cols)[keep]
+        ).tolist()
+        
+        co_nums = [co_num for _, co_num in co_columns]
+        max_marks = {
+            'co_max': dict(zip(co_nums, max_values)),
+            'total_max': max_values[-1]
+        }
+        
+        reg_nos = ids.iloc[:, 0].astype(str).str.strip()
+        names = ids.iloc[:, 1].astype(str).str.strip()
+        students = {
+            reg_no: {
+                'name': name,
+                'reg_no': reg_no,
+                'co_marks': dict(zip(co_nums, values)),
+                'total': values[-1]
+            }
+            for reg_no, name, values in zip(reg_nos, names, student_values)
+        }
+        
+        return {
+            'fields': fields,
+            'max_marks': max_marks,
+            'students': students
+        }
     
     def extract_student_data(self, file_source: Union[str, BytesIO]) -> Dict[str, Dict]:
         """
@@ -187,60 +497,7 @@ class DataParser:
                 ...
             }
         """
-        wb = self.load_workbook(file_source)
-        ws = wb.active
-        
-        # Find CO columns
-        co_columns = self.find_co_columns(ws)
-        
-        # Find TOTAL column
-        total_col = None
-        for col in range(4, ws.max_column + 1):
-            header = ws.cell(row=self.QUESTION_ROW, column=col).value
-            if header and 'TOTAL' in str(header).upper():
-                total_col = col
-                break
-        
-        # Extract student data
-        students = {}
-        for row in range(self.DATA_START_ROW, ws.max_row + 1):
-            reg_no = ws.cell(row=row, column=self.REG_NO_COL).value
-            name = ws.cell(row=row, column=self.NAME_COL).value
-            
-            # Skip empty rows
-            if not reg_no or not name:
-                continue
-            
-            reg_no = str(reg_no).strip()
-            name = str(name).strip()
-            
-            # Extract CO marks
-            co_marks = {}
-            for col, co_num in co_columns:
-                mark = ws.cell(row=row, column=col).value
-                try:
-                    co_marks[co_num] = float(mark) if mark is not None else 0
-                except (ValueError, TypeError):
-                    co_marks[co_num] = 0
-            
-            # Extract total
-            total = 0
-            if total_col:
-                total_val = ws.cell(row=row, column=total_col).value
-                try:
-                    total = float(total_val) if total_val is not None else 0
-                except (ValueError, TypeError):
-                    total = 0
-            
-            students[reg_no] = {
-                'name': name,
-                'reg_no': reg_no,
-                'co_marks': co_marks,
-                'total': total
-            }
-        
-        wb.close()
-        return students
+        return self.parse_workbook(file_source)['students']
     
     def extract_max_marks(self, file_source: Union[str, BytesIO]) -> Dict[str, Any]:
         """
@@ -256,41 +513,7 @@ class DataParser:
                 'total_max': 50
             }
         """
-        wb = self.load_workbook(file_source)
-        ws = wb.active
-        
-        co_columns = self.find_co_columns(ws)
-        
-        # Find TOTAL column
-        total_col = None
-        for col in range(4, ws.max_column + 1):
-            header = ws.cell(row=self.QUESTION_ROW, column=col).value
-            if header and 'TOTAL' in str(header).upper():
-                total_col = col
-                break
-        
-        # Extract max marks from row 13
-        co_max = {}
-        for col, co_num in co_columns:
-            max_mark = ws.cell(row=self.MAX_MARKS_ROW, column=col).value
-            try:
-                co_max[co_num] = float(max_mark) if max_mark is not None else 0
-            except (ValueError, TypeError):
-                co_max[co_num] = 0
-        
-        total_max = 0
-        if total_col:
-            total_val = ws.cell(row=self.MAX_MARKS_ROW, column=total_col).value
-            try:
-                total_max = float(total_val) if total_val is not None else 0
-            except (ValueError, TypeError):
-                total_max = 0
-        
-        wb.close()
-        return {
-            'co_max': co_max,
-            'total_max': total_max
-        }
+        return self.parse_workbook(file_source)['max_marks']
     
     def merge_eval_data(self, eval_data_list: List[Dict]) -> Dict[str, Dict]:
         """
@@ -306,21 +529,16 @@ class DataParser:
         
         for eval_data in eval_data_list:
             for reg_no, student_info in eval_data.items():
-                if reg_no not in merged:
-                    merged[reg_no] = {
-                        'name': student_info['name'],
-                        'reg_no': reg_no,
-                        'co_marks': {}
-                    }
+                entry = merged.setdefault(reg_no, {
+                    'name': student_info['name'],
+                    'reg_no': reg_no,
+                    'co_marks': {}
+                })
                 
-                # Merge CO marks
+                # Merge CO marks; if a CO already exists the first value is kept
+                co_marks = entry['co_marks']
                 for co_num, mark in student_info['co_marks'].items():
-                    if co_num not in merged[reg_no]['co_marks']:
-                        merged[reg_no]['co_marks'][co_num] = mark
-                    else:
-                        # If CO already exists, keep the existing value or take max
-                        # (depends on requirement - here we keep first)
-                        pass
+                    co_marks.setdefault(co_num, mark)
         
         return merged
     
@@ -334,9 +552,7 @@ class DataParser:
         Returns:
             List of student dictionaries sorted by registration number
         """
-        students = list(student_data.values())
-        students.sort(key=lambda x: x['reg_no'])
-        return students
+        return sorted(student_data.values(), key=itemgetter('reg_no'))
 
 
 # Test the parser
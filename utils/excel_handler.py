@@ -7,12 +7,45 @@ from openpyxl.utils import get_column_letter
 from pathlib import Path
 from typing import Dict, List, Any, Optional, Tuple, Union
 from copy import copy
-import shutil
 from io import BytesIO
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+from operator import itemgetter
 from .template_mapper import TemplateMapper
 from .data_parser import DataParser
 
 
+@lru_cache(maxsize=16)
+def _read_template_bytes(template_path: str, mtime: float) -> bytes:
+    """Read a template file once per modification time (mtime is the cache key)"""
+    return Path(template_path).read_bytes()
+
+
+def _open_template(template_path: Path) -> openpyxl.Workbook:
+    """Open an in-memory copy of the cached template bytes, keeping formulas"""
+    template_bytes = _read_template_bytes(str(template_path), template_path.stat().st_mtime)
+    return openpyxl.load_workbook(BytesIO(template_bytes), data_only=False)
+
+
+def _build_column_plan(co_columns: Dict[int, Dict[str, Optional[int]]]) -> Tuple[Tuple[int, str, int], ...]:
+    """
+    Flatten a {co_num: {assessment_type: column}} mapping for filling rows
+    
+    Returns:
+        (column, assessment_type, co_num) triples sorted by column, with
+        unmapped (None) columns left out
+    """
+    return tuple(sorted(
+        (
+            (col, assessment_type, co_num)
+            for co_num, assessment_cols in co_columns.items()
+            for assessment_type, col in assessment_cols.items()
+            if col is not None
+        ),
+        key=itemgetter(0)
+    ))
+
+
 class ExcelHandler:
     """Handles Excel operations for attainment sheet generation"""
     
@@ -73,6 +106,11 @@ class ExcelHandler:
         }
     }
     
+    # Flatten each mapping's co_columns into a 'plan' once, at class load
+    for _mapping in (R17_DEPT_THEORY_MAPPING, R17_SH_THEORY_MAPPING, R17_LAB_MAPPING, R17_PROJECT_MAPPING):
+        _mapping['plan'] = _build_column_plan(_mapping['co_columns'])
+    del _mapping
+    
     def __init__(self, base_path: str = None):
         """
         Initialize ExcelHandler
@@ -87,6 +125,9 @@ class ExcelHandler:
         
         self.template_mapper = TemplateMapper(self.base_path)
         self.parser = DataParser()
+        # Cache per instance: an lru_cache on the method would be shared by
+        # the class and keep every handler alive
+        self._resolve = lru_cache(maxsize=64)(self._resolve)
     
     def get_mapping(self, regulation: str, category: str, dept_type: str) -> Dict:
         """
@@ -119,6 +160,19 @@ class ExcelHandler:
         # Default to R17 Dept Theory mapping
         return self.R17_DEPT_THEORY_MAPPING
     
+    def _resolve(self, regulation: str, category: str, dept_type: str) -> Tuple[Path, Dict]:
+        """
+        Resolve template path and mapping for one sheet type
+        
+        These only depend on the (regulation, category, dept_type) strings,
+        so they are worked out once per combination and reused.
+        
+        Returns:
+            Tuple of (template_path, mapping)
+        """
+        template_path = self.template_mapper.get_template_path(regulation, category, dept_type)
+        return template_path, self.get_mapping(regulation, category, dept_type)
+    
     def load_template(self, regulation: str, category: str, dept_type: str = 'dept') -> Tuple[openpyxl.Workbook, Path]:
         """
         Load the appropriate template
@@ -135,9 +189,7 @@ class ExcelHandler:
             regulation, category, dept_type
         )
         
-        # Load with data_only=False to preserve formulas
-        wb = openpyxl.load_workbook(template_path, data_only=False)
-        return wb, template_path
+        return _open_template(template_path), template_path
     
     def copy_template(self, template_path: Path, output_path: Path) -> openpyxl.Workbook:
         """
@@ -153,11 +205,9 @@ class ExcelHandler:
         # Ensure output directory exists
         output_path.parent.mkdir(parents=True, exist_ok=True)
         
-        # Copy file
-        shutil.copy(template_path, output_path)
-        
-        # Open the copy
-        return openpyxl.load_workbook(output_path, data_only=False)
+        # Open an in-memory copy of the cached template bytes; the output
+        # file is only written once, by save_with_formulas
+        return _open_template(Path(template_path))
     
     def fill_student_data(
         self,
@@ -178,33 +228,38 @@ class ExcelHandler:
         ws = workbook.active
         
         # Sort students by registration number
-        sorted_students = sorted(student_data.items(), key=lambda x: x[0])
+        sorted_students = sorted(student_data.items(), key=itemgetter(0))
         
         data_start_row = mapping['data_start_row']
         reg_no_col = mapping['reg_no_col']
         name_col = mapping['name_col']
-        co_columns = mapping['co_columns']
+        # Built-in mappings carry a precomputed plan; flatten custom ones here
+        plan = mapping.get('plan') or _build_column_plan(mapping['co_columns'])
+        
+        # Bind each planned column to its assessment's data, left to right
+        column_plan = [
+            (col, eval_data[assessment_type], co_num)
+            for col, assessment_type, co_num in plan
+            if assessment_type in eval_data
+        ]
         
-        for idx, (reg_no, student_info) in enumerate(sorted_students):
-            row = data_start_row + idx
+        cell = ws.cell
+        for row, (reg_no, student_info) in enumerate(sorted_students, start=data_start_row):
+            # Build the row's values first, then write only the filled cells
+            row_values = [(reg_no_col, reg_no), (name_col, student_info['name'])]
             
-            # Fill reg no and name
-            ws.cell(row=row, column=reg_no_col, value=reg_no)
-            ws.cell(row=row, column=name_col, value=student_info['name'])
+            # CO marks from each assessment
+            for col, assessment_data, co_num in column_plan:
+                student_marks = assessment_data.get(reg_no)
+                if student_marks is None:
+                    continue
+                
+                mark = student_marks.get('co_marks', {}).get(co_num, '')
+                if mark != '':
+                    row_values.append((col, mark))
             
-            # Fill CO marks from each assessment
-            for co_num, assessment_cols in co_columns.items():
-                for assessment_type, col in assessment_cols.items():
-                    if col is None:
-                        continue
-                    
-                    # Get marks from eval_data
-                    if assessment_type in eval_data:
-                        if reg_no in eval_data[assessment_type]:
-                            co_marks = eval_data[assessment_type][reg_no].get('co_marks', {})
-                            mark = co_marks.get(co_num, '')
-                            if mark != '':
-                                ws.cell(row=row, column=col, value=mark)
+            for col, value in row_values:
+                cell(row=row, column=col, value=value)
     
     def save_with_formulas(self, workbook: openpyxl.Workbook, output_path: Path) -> None:
         """
@@ -242,28 +297,27 @@ class ExcelHandler:
             Result dictionary with success status and file path or error
         """
         try:
-            # Load template
-            template_wb, template_path = self.load_template(regulation, category, dept_type)
-            
-            # Get mapping
-            mapping = self.get_mapping(regulation, category, dept_type)
+            # Resolve template (loaded once below, by copy_template) and mapping
+            template_path, mapping = self._resolve(regulation, category, dept_type)
             
-            # Parse all evaluation files
-            eval_data = {}
-            merged_students = {}
+            # Parse all evaluation files concurrently (each file is independent)
+            with ThreadPoolExecutor(max_workers=max(len(eval_files), 1)) as executor:
+                futures = {
+                    assessment_type: executor.submit(self.parser.extract_student_data, file_source)
+                    for assessment_type, file_source in eval_files.items()
+                }
+                eval_data = {
+                    assessment_type: future.result()
+                    for assessment_type, future in futures.items()
+                }
             
-            for assessment_type, file_source in eval_files.items():
-                # Extract student data
-                students = self.parser.extract_student_data(file_source)
-                eval_data[assessment_type] = students
-                
-                # Merge student info
-                for reg_no, student_info in students.items():
-                    if reg_no not in merged_students:
-                        merged_students[reg_no] = {
-                            'name': student_info['name'],
-                            'reg_no': reg_no
-                        }
+            # Merge student info; sheets are walked last to first so the
+            # name from the first sheet listing a student wins
+            merged_students = {
+                reg_no: {'name': student_info['name'], 'reg_no': reg_no}
+                for students in reversed(list(eval_data.values()))
+                for reg_no, student_info in students.items()
+            }
             
             # Copy template
             output_path = Path(output_path)
@@ -288,6 +342,54 @@ class ExcelHandler:
             }
 
 
+_worker_handler = None
+
+
+def _get_worker_handler() -> ExcelHandler:
+    """Handler reused by every job in this process, so its caches persist"""
+    global _worker_handler
+    if _worker_handler is None:
+        _worker_handler = ExcelHandler()
+    return _worker_handler
+
+
+def generate_from_bytes(
+    regulation: str,
+    category: str,
+    dept_type: str,
+    eval_bytes: Dict[str, Tuple[str, bytes]],
+    output_path: str,
+    course_info: Dict[str, str] = None
+) -> Dict[str, Any]:
+    """
+    Generate attainment sheet from raw file contents
+    
+    Entry point for background workers: arguments are plain picklable
+    values, so it can be submitted to a process pool.
+    
+    Args:
+        eval_bytes: Dict mapping assessment type to (filename, file bytes)
+        (other arguments as in ExcelHandler.generate_attainment_sheet)
+        
+    Returns:
+        Result dictionary from generate_attainment_sheet
+    """
+    eval_files = {}
+    for assessment_type, (filename, data) in eval_bytes.items():
+        file_content = BytesIO(data)
+        file_content.name = filename
+        eval_files[assessment_type] = file_content
+    
+    return _get_worker_handler().generate_attainment_sheet(
+        regulation=regulation,
+        category=category,
+        dept_type=dept_type,
+        eval_files=eval_files,
+        output_path=output_path,
+        course_info=course_info
+    )
+
+
 # Test the handler
 if __name__ == '__main__':
     handler = ExcelHandler()
@@ -3,14 +3,50 @@ Template Mapper Module
 Maps regulation, category, and department type to correct template files
 """
 import os
+from functools import lru_cache
 from pathlib import Path
+from types import MappingProxyType
+
+
+def _freeze(value):
+    """Read-only copy of nested config: dicts become mapping proxies, lists tuples"""
+    if isinstance(value, dict):
+        return MappingProxyType({key: _freeze(item) for key, item in value.items()})
+    if isinstance(value, list):
+        return tuple(_freeze(item) for item in value)
+    return value
+
+
+def _build_index(template_map: dict) -> tuple:
+    """
+    Flatten the nested template map into single-probe lookup tables
+    
+    Returns:
+        Tuple of ({(reg, cat, dept): filename}, {reg: (categories,)},
+        {(reg, cat): (dept types as offered to the UI,)})
+    """
+    flat_templates = {}
+    categories_by_reg = {}
+    depts_by_regcat = {}
+    
+    for regulation, categories in template_map.items():
+        categories_by_reg[regulation] = tuple(categories)
+        for category, templates in categories.items():
+            for dept_type, filename in templates.items():
+                flat_templates[(regulation, category, dept_type)] = filename
+            
+            # 'default' is only offered when it is the sole option
+            dept_types = tuple(d for d in templates if d != 'default')
+            depts_by_regcat[(regulation, category)] = dept_types or ('default',)
+    
+    return flat_templates, categories_by_reg, depts_by_regcat
 
 
 class TemplateMapper:
     """Maps regulation + category + dept_type to correct template file"""
     
-    # Template mapping configuration
-    TEMPLATE_MAP = {
+    # Template mapping configuration (read-only)
+    TEMPLATE_MAP = _freeze({
         'R17': {
             'theory': {
                 'dept': 'Dept THEORY template_ R17 V3 AtSheet.xlsx',
@@ -67,10 +103,15 @@ class TemplateMapper:
                 'default': 'Project template_R21 V1 AtSheet.xlsx'
             }
         }
-    }
+    })
+    
+    # Flat views of TEMPLATE_MAP, built once at import; get_available_*
+    # return these precomputed tuples as-is
+    _FLAT_TEMPLATES, _CATEGORIES_BY_REG, _DEPTS_BY_REGCAT = _build_index(TEMPLATE_MAP)
+    _AVAILABLE_REGS = tuple(TEMPLATE_MAP)
     
-    # Required input files for each category
-    REQUIRED_INPUTS = {
+    # Required input files for each category (read-only)
+    REQUIRED_INPUTS = _freeze({
         'R17': {
             'theory': ['IA1', 'IA2', 'Model'],
             'analytical': ['IA1', 'IA2', 'Model'],
@@ -91,7 +132,7 @@ class TemplateMapper:
             'lab': ['Lab'],
             'project': ['Review1', 'Review2', 'Review3']
         }
-    }
+    })
     
     def __init__(self, base_path: str = None):
         """
@@ -106,8 +147,13 @@ class TemplateMapper:
             self.base_path = Path(base_path)
         
         self.template_dir = self.base_path / 'Attainment_Template'
+        # Cache per instance: an lru_cache on the method would be shared by
+        # the class and keep every mapper alive
+        self._resolve_template = lru_cache(maxsize=64)(self._resolve_template)
     
-    def get_regulation_folder(self, regulation: str) -> str:
+    @staticmethod
+    @lru_cache(maxsize=8)
+    def get_regulation_folder(regulation: str) -> str:
         """
         Get folder name for regulation
         
@@ -139,24 +185,24 @@ class TemplateMapper:
         Raises:
             ValueError: If template not found for given parameters
         """
-        regulation = regulation.upper()
-        category = category.lower()
-        dept_type = dept_type.lower()
-        
-        if regulation not in self.TEMPLATE_MAP:
-            raise ValueError(f"Unknown regulation: {regulation}. Valid options: {list(self.TEMPLATE_MAP.keys())}")
-        
-        if category not in self.TEMPLATE_MAP[regulation]:
-            raise ValueError(f"Unknown category: {category} for {regulation}. Valid options: {list(self.TEMPLATE_MAP[regulation].keys())}")
-        
-        category_templates = self.TEMPLATE_MAP[regulation][category]
+        # Normalize first so equivalent spellings share one cache entry
+        return self._resolve_template(regulation.upper(), category.lower(), dept_type.lower())
+    
+    def _resolve_template(self, regulation: str, category: str, dept_type: str) -> Path:
+        """Resolve and stat a template once per normalized key (errors are not cached)"""
+        template_filename = (
+            self._FLAT_TEMPLATES.get((regulation, category, dept_type))
+            or self._FLAT_TEMPLATES.get((regulation, category, 'default'))
+        )
         
-        # Get template filename
-        if dept_type in category_templates:
-            template_filename = category_templates[dept_type]
-        elif 'default' in category_templates:
-            template_filename = category_templates['default']
-        else:
+        if template_filename is None:
+            # Work out which part of the key is unknown for the error message
+            if regulation not in self.TEMPLATE_MAP:
+                raise ValueError(f"Unknown regulation: {regulation}. Valid options: {list(self.TEMPLATE_MAP.keys())}")
+            
+            if category not in self.TEMPLATE_MAP[regulation]:
+                raise ValueError(f"Unknown category: {category} for {regulation}. Valid options: {list(self.TEMPLATE_MAP[regulation].keys())}")
+            
             raise ValueError(f"Unknown department type: {dept_type} for {regulation}/{category}")
         
         # Construct full path
@@ -168,7 +214,7 @@ class TemplateMapper:
         
         return template_path
     
-    def get_required_inputs(self, regulation: str, category: str) -> list:
+    def get_required_inputs(self, regulation: str, category: str) -> tuple:
         """
         Get list of required input files for given regulation and category
         
@@ -177,7 +223,7 @@ class TemplateMapper:
             category: Course category (theory, analytical, lab, project)
             
         Returns:
-            List of required input types (e.g., ['IA1', 'IA2', 'Model'])
+            Tuple of required input types (e.g., ('IA1', 'IA2', 'Model'))
         """
         regulation = regulation.upper()
         category = category.lower()
@@ -190,32 +236,17 @@ class TemplateMapper:
         
         return self.REQUIRED_INPUTS[regulation][category]
     
-    def get_available_regulations(self) -> list:
-        """Get list of available regulations"""
-        return list(self.TEMPLATE_MAP.keys())
+    def get_available_regulations(self) -> tuple:
+        """Get available regulations"""
+        return self._AVAILABLE_REGS
     
-    def get_available_categories(self, regulation: str) -> list:
-        """Get list of available categories for a regulation"""
-        regulation = regulation.upper()
-        if regulation not in self.TEMPLATE_MAP:
-            return []
-        return list(self.TEMPLATE_MAP[regulation].keys())
+    def get_available_categories(self, regulation: str) -> tuple:
+        """Get available categories for a regulation"""
+        return self._CATEGORIES_BY_REG.get(regulation.upper(), ())
     
-    def get_available_dept_types(self, regulation: str, category: str) -> list:
-        """Get list of available department types for a regulation and category"""
-        regulation = regulation.upper()
-        category = category.lower()
-        
-        if regulation not in self.TEMPLATE_MAP:
-            return []
-        if category not in self.TEMPLATE_MAP[regulation]:
-            return []
-        
-        dept_types = list(self.TEMPLATE_MAP[regulation][category].keys())
-        # Remove 'default' from the list if present and return meaningful options
-        if 'default' in dept_types and len(dept_types) == 1:
-            return ['default']
-        return [d for d in dept_types if d != 'default']
+    def get_available_dept_types(self, regulation: str, category: str) -> tuple:
+        """Get available department types for a regulation and category"""
+        return self._DEPTS_BY_REGCAT.get((regulation.upper(), category.lower()), ())
 
 
 # Test the mapper
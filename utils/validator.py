@@ -2,24 +2,73 @@
 Validator Module
 Validates consistency across multiple evaluation sheets
 """
-from typing import Dict, List, Any, Optional, Union
-from dataclasses import dataclass
-from pathlib import Path
+import hashlib
+import os
+import pickle
+import sys
+import tempfile
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+from typing import Dict, List, Any, NamedTuple, Optional, Tuple, Union
 from io import BytesIO
-from .data_parser import DataParser
+import numpy as np
+from .data_parser import DataParser, content_digest
 
 
-@dataclass
-class ValidationResult:
+# Shared value for results without errors or warnings
+_EMPTY = ()
+
+# Message templates by code, filled from ValidationMessage params
+MESSAGES = {
+    'no_files': "No files provided for validation",
+    'file_not_found': "File not found: {source}",
+    'file_closed': "File object is closed",
+    'read_error': "Error reading {source}: {error}",
+    'mismatch': "Mismatch in '{field}': '{ref}' (in {ref_file}) vs '{cur}' (in {cur_file})",
+    'difference': "Difference in '{field}': '{ref}' vs '{cur}'",
+    'regulation_mismatch': "Regulation mismatch in {source}: expected {expected}, found {actual}",
+    'students_unreadable': "Could not check students in {source}: {error}",
+    'student_missing': "Student {reg_no} missing from: {files}",
+    'marks_error': "Error validating marks: {error}",
+    'negative_marks': "Negative marks for {reg_no} in CO{co}: {mark}",
+    'marks_exceed': "Marks exceed max for {reg_no} in CO{co}: {mark} > {max_mark}",
+}
+
+
+class ValidationMessage(NamedTuple):
+    """An error or warning; the text is only built when it is displayed"""
+    code: str
+    params: Dict[str, Any]
+    
+    def __str__(self):
+        return MESSAGES[self.code].format(**self.params)
+
+
+class ValidationResult(NamedTuple):
     """Result of validation check"""
     is_valid: bool
-    errors: List[str]
-    warnings: List[str]
+    errors: Tuple[ValidationMessage, ...]
+    warnings: Tuple[ValidationMessage, ...]
+    # Per-file metadata parsed during validation (input order), so callers
+    # don't have to reopen the workbooks to read course details
+    metadata: Tuple[Dict[str, str], ...] = _EMPTY
+    
+    @property
+    def formatted_errors(self) -> Tuple[str, ...]:
+        """Error messages as text"""
+        return tuple(map(str, self.errors))
+    
+    @property
+    def formatted_warnings(self) -> Tuple[str, ...]:
+        """Warning messages as text"""
+        return tuple(map(str, self.warnings))
     
     def __str__(self):
         if self.is_valid:
             return "Validation Passed"
-        return f"Validation Failed: {'; '.join(self.errors)}"
+        return f"Validation Failed: {'; '.join(self.formatted_errors)}"
 
 
 class Validator:
@@ -39,9 +88,153 @@ class Validator:
         'class_info'
     ]
     
+    # Parsed sheets kept across validation runs, keyed by content signature
+    PARSE_CACHE_SIZE = 32
+    
+    # Prefix of on-disk cache entries; bump when DataParser output changes
+    PARSE_CACHE_VERSION = 'v1'
+    
     def __init__(self):
         """Initialize Validator"""
         self.parser = DataParser()
+        # Sheets of a course share a handful of raw regulation strings
+        self._norm_reg = lru_cache(maxsize=64)(self.parser.normalize_regulation)
+        # Shared by the app's request threads and the loader threads
+        self._parsed = OrderedDict()
+        self._parsed_lock = threading.Lock()
+        # Optional on-disk cache shared across processes and restarts. Entries
+        # are unpickled, so only point it at a directory you trust.
+        self._cache_dir = os.environ.get('COPO_CACHE_DIR') or None
+    
+    @staticmethod
+    def _source_signature(source: Union[str, BytesIO]) -> Any:
+        """Content key for a sheet: (path, mtime, size) for paths, a hash of the bytes otherwise"""
+        if isinstance(source, str):
+            stat = os.stat(source)
+            return (os.path.abspath(source), stat.st_mtime_ns, stat.st_size)
+        
+        return content_digest(source)
+    
+    def _parse_cached(self, source: Union[str, BytesIO]) -> Dict[str, Any]:
+        """Parse a sheet unless the same content was parsed recently"""
+        try:
+            signature = self._source_signature(source)
+        except (OSError, ValueError):
+            # Missing path or closed file: let the parser raise its usual error
+            return self.parser.parse_workbook(source)
+        
+        with self._parsed_lock:
+            parsed = self._parsed.get(signature)
+            if parsed is not None:
+                self._parsed.move_to_end(signature)
+                return parsed
+        
+        disk_key = self._persistent_cache_key(source, signature) if self._cache_dir else None
+        parsed = self._persistent_cache_get(disk_key) if disk_key else None
+        if parsed is None:
+            parsed = self.parser.parse_workbook(source)
+            if disk_key:
+                self._persistent_cache_put(disk_key, parsed)
+        
+        with self._parsed_lock:
+            self._parsed[signature] = parsed
+            if len(self._parsed) > self.PARSE_CACHE_SIZE:
+                self._parsed.popitem(last=False)
+        return parsed
+    
+    def _persistent_cache_key(self, source: Union[str, BytesIO], signature: Any) -> Optional[str]:
+        """On-disk cache key: schema version plus a hash of the sheet's bytes"""
+        if isinstance(source, str):
+            try:
+                with open(source, 'rb') as f:
+                    signature = hashlib.blake2b(f.read(), digest_size=16).hexdigest()
+            except OSError:
+                return None
+        return f"{self.PARSE_CACHE_VERSION}-{signature}"
+    
+    def _persistent_cache_get(self, key: str) -> Optional[Dict[str, Any]]:
+        """Load a parsed sheet from the on-disk cache, or None on a miss"""
+        try:
+            with open(os.path.join(self._cache_dir, key + '.pkl'), 'rb') as f:
+                return pickle.load(f)
+        except Exception:
+            # Missing, truncated or stale entries are just a cache miss
+            return None
+    
+    def _persistent_cache_put(self, key: str, parsed: Dict[str, Any]):
+        """Write a parsed sheet to the on-disk cache (best effort)"""
+        try:
+            os.makedirs(self._cache_dir, exist_ok=True)
+            fd, tmp_path = tempfile.mkstemp(dir=self._cache_dir, suffix='.tmp')
+            try:
+                with os.fdopen(fd, 'wb') as f:
+                    f.write(pickle.dumps(parsed, protocol=5))
+                # Readers only ever see complete entries
+                os.replace(tmp_path, os.path.join(self._cache_dir, key + '.pkl'))
+            except BaseException:
+                os.unlink(tmp_path)
+                raise
+        except (OSError, pickle.PicklingError):
+            pass
+    
+    def _load_all(self, file_sources: List[Union[str, BytesIO]]) -> List[Dict[str, Any]]:
+        """
+        Parse every source once into records shared by all checks
+        
+        Args:
+            file_sources: List of evaluation sheet file paths or BytesIO objects
+            
+        Returns:
+            One record per source, in input order:
+            {'source': ..., 'index': ..., 'name': display name,
+             'parsed': {...} or None, 'error': message or None}
+        """
+        # Load each distinct source once: the same file object listed twice
+        # must not be read from two threads through one shared cursor
+        unique = {}
+        for source in file_sources:
+            unique.setdefault(source if isinstance(source, str) else id(source), source)
+        sources = list(unique.values())
+        
+        if len(sources) < 2:
+            loaded = [self._load_one(source) for source in sources]
+        else:
+            # Sheets are independent; map() keeps the results in input order
+            with ThreadPoolExecutor(max_workers=min(8, len(sources))) as executor:
+                loaded = list(executor.map(self._load_one, sources))
+        results = dict(zip(unique, loaded))
+        
+        records = []
+        for idx, source in enumerate(file_sources):
+            parsed, error = results[source if isinstance(source, str) else id(source)]
+            records.append({
+                'source': source,
+                'index': idx,
+                'name': self._source_name(source, idx),
+                'parsed': parsed,
+                'error': error
+            })
+        return records
+    
+    def _load_one(self, source: Union[str, BytesIO]) -> Tuple[Optional[Dict[str, Any]], Optional[str]]:
+        """Parse a single source for _load_all, returning (parsed, error)"""
+        # The only place load failures are caught; checks branch on 'error'
+        try:
+            return self._parse_cached(source), None
+        except Exception as e:
+            return None, str(e)
+    
+    @staticmethod
+    def _source_name(source: Union[str, BytesIO], idx: int, full_path: bool = False) -> str:
+        """
+        Name of a source for messages
+        
+        Paths give their file name (or the path itself with full_path);
+        file objects their name attribute, falling back to 'File <n>'.
+        """
+        if isinstance(source, str):
+            return source if full_path else os.path.basename(source)
+        return getattr(source, 'name', f'File {idx+1}')
     
     def validate_file_exists(self, file_sources: List[Union[str, BytesIO]]) -> ValidationResult:
         """
@@ -55,88 +248,109 @@ class Validator:
         """
         errors = []
         for source in file_sources:
-            if isinstance(source, str) and not Path(source).exists():
-                errors.append(f"File not found: {source}")
-            elif isinstance(source, BytesIO) and source.closed:
-                errors.append(f"BytesIO object is closed")
+            if isinstance(source, str) and not os.path.exists(source):
+                errors.append(ValidationMessage('file_not_found', {'source': source}))
+            elif not isinstance(source, str) and getattr(source, 'closed', False):
+                errors.append(ValidationMessage('file_closed', {}))
         
         return ValidationResult(
             is_valid=len(errors) == 0,
-            errors=errors,
-            warnings=[]
+            errors=tuple(errors),
+            warnings=_EMPTY
         )
     
-    def validate_consistency(self, file_sources: List[Union[str, BytesIO]]) -> ValidationResult:
+    def validate_consistency(self, file_sources: List[Union[str, BytesIO]], fail_fast: bool = False) -> ValidationResult:
         """
         Validate that all evaluation sheets have matching metadata
         
         Args:
             file_sources: List of evaluation sheet file paths or BytesIO objects
+            fail_fast: Stop at the first required-field mismatch instead of
+                collecting all of them (later sheets are not compared)
             
         Returns:
             ValidationResult with validation status and any errors
         """
-        if not file_sources:
+        # Check files exist/valid
+        file_check = self.validate_file_exists(file_sources)
+        if not file_check.is_valid:
+            return file_check
+        
+        return self._consistency_from_records(self._load_all(file_sources), fail_fast)
+    
+    def _consistency_from_records(self, records: List[Dict[str, Any]], fail_fast: bool = False) -> ValidationResult:
+        """validate_consistency over already loaded records"""
+        if not records:
             return ValidationResult(
                 is_valid=False,
-                errors=["No files provided for validation"],
-                warnings=[]
+                errors=(ValidationMessage('no_files', {}),),
+                warnings=_EMPTY
             )
         
         errors = []
         warnings = []
         
-        # Check files exist/valid
-        file_check = self.validate_file_exists(file_sources)
-        if not file_check.is_valid:
-            return file_check
+        # A sheet that could not be read fails the check on its own
+        failed = next((record for record in records if record['error'] is not None), None)
+        if failed is not None:
+            source_name = self._source_name(failed['source'], failed['index'], full_path=True)
+            errors.append(ValidationMessage('read_error', {'source': source_name, 'error': failed['error']}))
+            return ValidationResult(is_valid=False, errors=tuple(errors), warnings=_EMPTY)
         
-        # Extract metadata from all files
+        compared_fields = self.REQUIRED_MATCH_FIELDS + self.RECOMMENDED_MATCH_FIELDS
+        required_fields = frozenset(self.REQUIRED_MATCH_FIELDS)
         all_metadata = []
-        for idx, source in enumerate(file_sources):
-            try:
-                metadata = self.parser.extract_validation_fields(source)
-                # Store identifier for error messages
-                if isinstance(source, BytesIO):
-                    metadata['file_identifier'] = getattr(source, 'name', f'File {idx+1}')
-                else:
-                    metadata['file_identifier'] = Path(source).name
-                all_metadata.append(metadata)
-            except Exception as e:
-                source_name = getattr(source, 'name', f'File {idx+1}') if isinstance(source, BytesIO) else source
-                errors.append(f"Error reading {source_name}: {str(e)}")
-                return ValidationResult(is_valid=False, errors=errors, warnings=[])
-        
-        # Compare required fields
-        reference = all_metadata[0]
-        for i, metadata in enumerate(all_metadata[1:], start=1):
-            for field in self.REQUIRED_MATCH_FIELDS:
-                ref_value = reference.get(field, '').strip().upper()
-                cur_value = metadata.get(field, '').strip().upper()
-                
-                if ref_value != cur_value:
-                    errors.append(
-                        f"Mismatch in '{field}': "
-                        f"'{reference[field]}' (in {reference['file_identifier']}) vs "
-                        f"'{metadata[field]}' (in {metadata['file_identifier']})"
-                    )
-        
-        # Check recommended fields (warnings only)
-        for i, metadata in enumerate(all_metadata[1:], start=1):
-            for field in self.RECOMMENDED_MATCH_FIELDS:
-                ref_value = reference.get(field, '').strip().upper()
-                cur_value = metadata.get(field, '').strip().upper()
+        reference = ref_values = reference_name = None
+        
+        # Stream the sheets: the first is the reference and every later one
+        # is normalized and compared as it comes, so only the reference's
+        # normalized values are kept around
+        for record in records:
+            metadata = dict(record['parsed']['fields'])
+            # Store identifier for error messages
+            metadata['file_identifier'] = record['name']
+            all_metadata.append(metadata)
+            values = {
+                field: sys.intern((metadata.get(field) or '').strip().upper())
+                for field in compared_fields
+            }
+            
+            if reference is None:
+                reference, ref_values, reference_name = metadata, values, record['name']
+                continue
+            
+            # Required fields are errors, the rest warnings
+            for field in compared_fields:
+                if ref_values[field] == values[field]:
+                    continue
                 
-                if ref_value != cur_value:
-                    warnings.append(
-                        f"Difference in '{field}': "
-                        f"'{reference[field]}' vs '{metadata[field]}'"
-                    )
+                if field in required_fields:
+                    errors.append(ValidationMessage('mismatch', {
+                        'field': field,
+                        'ref': reference[field],
+                        'ref_file': reference_name,
+                        'cur': metadata[field],
+                        'cur_file': record['name']
+                    }))
+                    if fail_fast:
+                        return ValidationResult(
+                            is_valid=False,
+                            errors=tuple(errors),
+                            warnings=tuple(warnings),
+                            metadata=tuple(all_metadata)
+                        )
+                else:
+                    warnings.append(ValidationMessage('difference', {
+                        'field': field,
+                        'ref': reference[field],
+                        'cur': metadata[field]
+                    }))
         
         return ValidationResult(
             is_valid=len(errors) == 0,
-            errors=errors,
-            warnings=warnings
+            errors=tuple(errors),
+            warnings=tuple(warnings),
+            metadata=tuple(all_metadata)
         )
     
     def validate_regulation(self, file_sources: List[Union[str, BytesIO]], expected_regulation: str) -> ValidationResult:
@@ -150,28 +364,31 @@ class Validator:
         Returns:
             ValidationResult
         """
+        return self._regulation_from_records(self._load_all(file_sources), expected_regulation)
+    
+    def _regulation_from_records(self, records: List[Dict[str, Any]], expected_regulation: str) -> ValidationResult:
+        """validate_regulation over already loaded records"""
         errors = []
-        expected_norm = self.parser.normalize_regulation(expected_regulation)
+        expected_norm = self._norm_reg(expected_regulation)
         
-        for idx, source in enumerate(file_sources):
-            try:
-                metadata = self.parser.extract_validation_fields(source)
-                actual_reg = self.parser.normalize_regulation(metadata.get('regulation', ''))
-                
-                if actual_reg != expected_norm:
-                    source_name = getattr(source, 'name', f'File {idx+1}') if isinstance(source, BytesIO) else Path(source).name
-                    errors.append(
-                        f"Regulation mismatch in {source_name}: "
-                        f"expected {expected_norm}, found {actual_reg}"
-                    )
-            except Exception as e:
-                source_name = getattr(source, 'name', f'File {idx+1}') if isinstance(source, BytesIO) else source
-                errors.append(f"Error reading {source_name}: {str(e)}")
+        for record in records:
+            if record['error'] is not None:
+                source_name = self._source_name(record['source'], record['index'], full_path=True)
+                errors.append(ValidationMessage('read_error', {'source': source_name, 'error': record['error']}))
+                continue
+            
+            actual_reg = self._norm_reg(record['parsed']['fields'].get('regulation', ''))
+            if actual_reg != expected_norm:
+                errors.append(ValidationMessage('regulation_mismatch', {
+                    'source': record['name'],
+                    'expected': expected_norm,
+                    'actual': actual_reg
+                }))
         
         return ValidationResult(
             is_valid=len(errors) == 0,
-            errors=errors,
-            warnings=[]
+            errors=tuple(errors),
+            warnings=_EMPTY
         )
     
     def validate_student_match(self, file_sources: List[Union[str, BytesIO]]) -> ValidationResult:
@@ -184,44 +401,51 @@ class Validator:
         Returns:
             ValidationResult with warnings for missing students
         """
+        return self._student_match_from_records(self._load_all(file_sources))
+    
+    def _student_match_from_records(self, records: List[Dict[str, Any]]) -> ValidationResult:
+        """validate_student_match over already loaded records"""
         warnings = []
         
         all_students = []
-        for idx, source in enumerate(file_sources):
-            try:
-                students = self.parser.extract_student_data(source)
-                source_name = getattr(source, 'name', f'File {idx+1}') if isinstance(source, BytesIO) else Path(source).name
-                all_students.append({
-                    'file': source_name,
-                    'reg_numbers': set(students.keys())
-                })
-            except Exception as e:
-                source_name = getattr(source, 'name', f'File {idx+1}') if isinstance(source, BytesIO) else source
-                warnings.append(f"Could not check students in {source_name}: {str(e)}")
+        for record in records:
+            if record['error'] is not None:
+                source_name = self._source_name(record['source'], record['index'], full_path=True)
+                warnings.append(ValidationMessage('students_unreadable', {'source': source_name, 'error': record['error']}))
+                continue
+            
+            all_students.append({
+                'file': record['name'],
+                'reg_numbers': set(record['parsed']['students'].keys())
+            })
         
         if len(all_students) < 2:
-            return ValidationResult(is_valid=True, errors=[], warnings=warnings)
-        
-        # Find students missing from some sheets
-        all_reg_numbers = set()
-        for sheet in all_students:
-            all_reg_numbers.update(sheet['reg_numbers'])
-        
-        for reg_no in all_reg_numbers:
-            missing_from = []
-            for sheet in all_students:
-                if reg_no not in sheet['reg_numbers']:
-                    missing_from.append(sheet['file'])
-            
-            if missing_from:
-                warnings.append(
-                    f"Student {reg_no} missing from: {', '.join(missing_from)}"
-                )
+            return ValidationResult(is_valid=True, errors=_EMPTY, warnings=tuple(warnings))
+        
+        # Usual case: every sheet lists the same students, nothing to diff
+        first = all_students[0]['reg_numbers']
+        if all(sheet['reg_numbers'] == first for sheet in all_students[1:]):
+            return ValidationResult(is_valid=True, errors=_EMPTY, warnings=tuple(warnings))
+        
+        # Record each student's sheets as a bitmask (bit i = sheet i); any
+        # student whose mask is not all ones is missing from the clear bits
+        present = {}
+        for idx, sheet in enumerate(all_students):
+            bit = 1 << idx
+            for reg_no in sheet['reg_numbers']:
+                present[reg_no] = present.get(reg_no, 0) | bit
+        
+        full = (1 << len(all_students)) - 1
+        for reg_no, mask in present.items():
+            if mask == full:
+                continue
+            files = [sheet['file'] for idx, sheet in enumerate(all_students) if not (mask >> idx) & 1]
+            warnings.append(ValidationMessage('student_missing', {'reg_no': reg_no, 'files': ', '.join(files)}))
         
         return ValidationResult(
             is_valid=True,  # Missing students is a warning, not error
-            errors=[],
-            warnings=warnings
+            errors=_EMPTY,
+            warnings=tuple(warnings)
         )
     
     def validate_marks_range(self, file_source: Union[str, BytesIO]) -> ValidationResult:
@@ -234,28 +458,55 @@ class Validator:
         Returns:
             ValidationResult
         """
-        errors = []
-        warnings = []
+        return self._marks_range_from_record(self._load_all([file_source])[0])
+    
+    def _marks_range_from_record(self, record: Dict[str, Any]) -> ValidationResult:
+        """validate_marks_range for an already loaded record"""
+        if record['error'] is not None:
+            return ValidationResult(
+                is_valid=False,
+                errors=(ValidationMessage('marks_error', {'error': record['error']}),),
+                warnings=_EMPTY
+            )
         
-        try:
-            max_marks = self.parser.extract_max_marks(file_source)
-            students = self.parser.extract_student_data(file_source)
-            
-            for reg_no, student in students.items():
-                for co_num, mark in student['co_marks'].items():
-                    max_mark = max_marks['co_max'].get(co_num, 0)
-                    
-                    if mark < 0:
-                        errors.append(
-                            f"Negative marks for {reg_no} in CO{co_num}: {mark}"
-                        )
-                    elif max_mark > 0 and mark > max_mark:
-                        warnings.append(
-                            f"Marks exceed max for {reg_no} in CO{co_num}: "
-                            f"{mark} > {max_mark}"
-                        )
-        except Exception as e:
-            errors.append(f"Error validating marks: {str(e)}")
+        max_marks = record['parsed']['max_marks']
+        students = record['parsed']['students']
+        
+        # Check the whole marks grid at once; messages are only built
+        # for the cells that are out of range
+        co_max = max_marks['co_max']
+        co_list = list(co_max)
+        reg_nos = list(students)
+        caps = np.array([co_max[co_num] for co_num in co_list], dtype=np.float64)
+        marks = np.array(
+            [[students[reg_no]['co_marks'].get(co_num, 0) for co_num in co_list] for reg_no in reg_nos],
+            dtype=np.float64
+        ).reshape(len(reg_nos), len(co_list))
+        
+        # Clean sheets (the norm) stop at two reductions
+        negative = marks < 0
+        over_max = (caps > 0) & (marks > caps)
+        errors = _EMPTY
+        warnings = _EMPTY
+        if negative.any():
+            errors = tuple(
+                ValidationMessage('negative_marks', {
+                    'reg_no': reg_nos[row],
+                    'co': co_list[col],
+                    'mark': marks[row, col]
+                })
+                for row, col in np.argwhere(negative)
+            )
+        if over_max.any():
+            warnings = tuple(
+                ValidationMessage('marks_exceed', {
+                    'reg_no': reg_nos[row],
+                    'co': co_list[col],
+                    'mark': marks[row, col],
+                    'max_mark': caps[col]
+                })
+                for row, col in np.argwhere(over_max)
+            )
         
         return ValidationResult(
             is_valid=len(errors) == 0,
@@ -263,17 +514,36 @@ class Validator:
             warnings=warnings
         )
     
-    def validate_all(self, file_sources: List[Union[str, BytesIO]], expected_regulation: str = None) -> ValidationResult:
+    def validate_all(self, file_sources: List[Union[str, BytesIO]], expected_regulation: str = None,
+                     fail_fast: bool = False) -> ValidationResult:
         """
         Run all validation checks
         
+        A sheet listed more than once (the same real path, or the same file
+        object) is validated once, at its first position.
+        
         Args:
             file_sources: List of evaluation sheet file paths or BytesIO objects
             expected_regulation: Optional expected regulation
+            fail_fast: Stop at the first metadata mismatch and skip the
+                regulation, student and marks checks
             
         Returns:
             Combined ValidationResult
         """
+        if not file_sources:
+            return ValidationResult(
+                is_valid=False,
+                errors=(ValidationMessage('no_files', {}),),
+                warnings=_EMPTY
+            )
+        
+        unique_sources = {}
+        for source in file_sources:
+            key = os.path.realpath(source) if isinstance(source, str) else id(source)
+            unique_sources.setdefault(key, source)
+        file_sources = list(unique_sources.values())
+        
         all_errors = []
         all_warnings = []
         
@@ -281,33 +551,45 @@ class Validator:
         result = self.validate_file_exists(file_sources)
         all_errors.extend(result.errors)
         if not result.is_valid:
-            return ValidationResult(is_valid=False, errors=all_errors, warnings=[])
+            return ValidationResult(is_valid=False, errors=tuple(all_errors), warnings=_EMPTY)
+        
+        # Every check below reads the same sheets; load each one once
+        records = self._load_all(file_sources)
         
         # Consistency check
-        result = self.validate_consistency(file_sources)
+        result = self._consistency_from_records(records, fail_fast=fail_fast)
         all_errors.extend(result.errors)
         all_warnings.extend(result.warnings)
+        all_metadata = result.metadata
+        if fail_fast and not result.is_valid:
+            return ValidationResult(
+                is_valid=False,
+                errors=tuple(all_errors),
+                warnings=tuple(all_warnings),
+                metadata=tuple(all_metadata)
+            )
         
         # Regulation check
         if expected_regulation:
-            result = self.validate_regulation(file_sources, expected_regulation)
+            result = self._regulation_from_records(records, expected_regulation)
             all_errors.extend(result.errors)
             all_warnings.extend(result.warnings)
         
         # Student match check
-        result = self.validate_student_match(file_sources)
+        result = self._student_match_from_records(records)
         all_warnings.extend(result.warnings)
         
         # Marks range check for each file
-        for source in file_sources:
-            result = self.validate_marks_range(source)
+        for record in records:
+            result = self._marks_range_from_record(record)
             all_errors.extend(result.errors)
             all_warnings.extend(result.warnings)
         
         return ValidationResult(
             is_valid=len(all_errors) == 0,
-            errors=all_errors,
-            warnings=all_warnings
+            errors=tuple(all_errors),
+            warnings=tuple(all_warnings),
+            metadata=tuple(all_metadata)
         )
 
 
@@ -325,21 +607,26 @@ if __name__ == '__main__':
     print("=== Consistency Validation ===")
     result = validator.validate_consistency(test_files)
     print(f"Valid: {result.is_valid}")
-    print(f"Errors: {result.errors}")
-    print(f"Warnings: {result.warnings}")
+    print(f"Errors: {result.formatted_errors}")
+    print(f"Warnings: {result.formatted_warnings}")
     
     print("\n=== Regulation Validation ===")
     result = validator.validate_regulation(test_files, 'R17')
     print(f"Valid: {result.is_valid}")
-    print(f"Errors: {result.errors}")
+    print(f"Errors: {result.formatted_errors}")
     
     print("\n=== Student Match Validation ===")
     result = validator.validate_student_match(test_files)
     print(f"Valid: {result.is_valid}")
-    print(f"Warnings (first 5): {result.warnings[:5]}")
+    print(f"Warnings (first 5): {result.formatted_warnings[:5]}")
     
     print("\n=== Full Validation ===")
     result = validator.validate_all(test_files, 'R17')
     print(f"Valid: {result.is_valid}")
     print(f"Total Errors: {len(result.errors)}")
     print(f"Total Warnings: {len(result.warnings)}")
+    
+    print("\n=== Empty Input ===")
+    result = validator.validate_all([], 'R17')
+    assert not result.is_valid and [e.code for e in result.errors] == ['no_files'], result
+    print(f"Errors: {result.formatted_errors}")
@@ -0,0 +1,10 @@
+"""
+WSGI entry point for production servers
+
+Usage:
+    gunicorn -w 1 -k gthread --threads 8 -b 0.0.0.0:5000 --timeout 120 wsgi:application
+    waitress-serve --threads=8 --listen=0.0.0.0:5000 wsgi:application
+"""
+from app import app
+
+application = app